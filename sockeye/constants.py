@@ -197,6 +197,7 @@ PARAMS_PREFIX = "params."
 PARAMS_NAME = PARAMS_PREFIX + "%05d"
 PARAMS_BEST_NAME = "params.best"
 PARAMS_BEST_NAME_FLOAT32 = PARAMS_BEST_NAME + ".float32"
+PARAMS_BEST_TEMP_NAME = "tmp." + PARAMS_BEST_NAME
 DECODE_OUT_NAME = "decode.output.%05d"
 DECODE_IN_NAME = "decode.source.%d"
 DECODE_REF_NAME = "decode.target"
@@ -215,8 +216,11 @@ BUCKET_ITER_STATE_NAME = "bucket.pkl"
 RNG_STATE_NAME = "rng.pkl"
 TRAINING_STATE_NAME = "training.pkl"
 AMP_LOSS_SCALER_STATE_NAME = "amp_loss_scaler.pkl"
+# RNG, training and AMP loss scaler states in a single file
+TRAINING_STATE_META_NAME = "meta.bin"
 SCHEDULER_STATE_NAME = "scheduler.pkl"
 TRAINING_STATE_PARAMS_NAME = "params"
+TRAINING_STATE_PARAMS_TEMP_NAME = "tmp." + TRAINING_STATE_PARAMS_NAME
 ARGS_STATE_NAME = "args.yaml"
 
 # Arguments that may differ and still resume training
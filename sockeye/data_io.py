@@ -22,6 +22,7 @@ import pickle
 import random
 from abc import ABC, abstractmethod
 from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from contextlib import ExitStack
 from typing import Any, cast, Dict, Iterator, Iterable, List, Optional, Sequence, Sized, Tuple, Set
 
@@ -1803,8 +1804,8 @@ class ShardedParallelSampleIter(BaseParallelSampleIter):
 
     def save_state(self, fname: str):
         with open(fname, "wb") as fp:
-            pickle.dump(self.shards_fnames, fp)
-            pickle.dump(self.shard_index, fp)
+            pickle.dump(self.shards_fnames, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self.shard_index, fp, protocol=pickle.HIGHEST_PROTOCOL)
         self.shard_iter.save_state(fname + ".sharditer")
 
     def load_state(self, fname: str):
@@ -1899,8 +1900,8 @@ class ParallelSampleIter(BaseParallelSampleIter):
         :param fname: File name to save the information to.
         """
         with open(fname, "wb") as fp:
-            pickle.dump(self.batch_indices, fp)
-            pickle.dump(self.curr_batch_index, fp)
+            pickle.dump(self.batch_indices, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self.curr_batch_index, fp, protocol=pickle.HIGHEST_PROTOCOL)
             np.save(fp, [a.asnumpy() for a in self.inverse_data_permutations], allow_pickle=True)
             np.save(fp, [a.asnumpy() for a in self.data_permutations], allow_pickle=True)
 
@@ -1937,6 +1938,74 @@ class ParallelSampleIter(BaseParallelSampleIter):
         self.data = self.data.permute(self.data_permutations)
 
 
+class PrefetchingParallelSampleIter(BaseParallelSampleIter):
+    """
+    Wraps a parallel sample iterator and prepares the next batch in a background thread while the current batch is
+    processed. Prepared batches are already split and loaded onto the given contexts, such that host-to-device copies
+    overlap with the computation on the previous batch.
+    The wrapped iterator is at most one batch ahead of the consumer. This is the batch that
+    ParallelSampleIter.load_state() rewinds to, so saved states resume at the first batch not yet consumed.
+
+    :param data_iter: Iterator to prefetch batches from.
+    :param context: Contexts to load batches onto.
+    """
+
+    def __init__(self, data_iter: BaseParallelSampleIter, context: List[mx.context.Context]) -> None:
+        super().__init__(buckets=data_iter.buckets, batch_size=data_iter.batch_size,
+                         bucket_batch_sizes=data_iter.bucket_batch_sizes, num_factors=data_iter.num_factors,
+                         permute=data_iter.permute, dtype=data_iter.dtype)
+        self.data_iter = data_iter
+        self.context = context
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._next_batch = None  # type: Optional[Future]
+        self._prefetch()
+
+    def _load_next(self) -> 'Batch':
+        return self.data_iter.next().split_and_load(ctx=self.context)
+
+    def _prefetch(self):
+        self._next_batch = self._executor.submit(self._load_next) if self.data_iter.iter_next() else None
+
+    def _wait(self):
+        """
+        Waits until the wrapped iterator is no longer advanced in the background.
+        """
+        if self._next_batch is not None:
+            wait([self._next_batch])
+
+    def reset(self):
+        self._wait()
+        self.data_iter.reset()
+        self._prefetch()
+
+    def iter_next(self) -> bool:
+        return self._next_batch is not None
+
+    def next(self) -> 'Batch':
+        if self._next_batch is None:
+            raise StopIteration
+        batch = self._next_batch.result()
+        self._prefetch()
+        return batch
+
+    def save_state(self, fname: str):
+        self._wait()
+        self.data_iter.save_state(fname)
+
+    def load_state(self, fname: str):
+        self._wait()
+        self.data_iter.load_state(fname)
+        self._prefetch()
+
+    def close(self):
+        """
+        Stops the background thread and releases the prefetched batch. The iterator cannot be used afterwards.
+        """
+        self._wait()
+        self._next_batch = None
+        self._executor.shutdown()
+
+
 class Batch:
 
     __slots__ = ['source', 'source_length', 'target', 'target_length', 'labels', 'samples', 'tokens']
@@ -17,7 +17,7 @@ Functions to generate loss symbols for sequence-to-sequence models.
 import logging
 import math
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import mxnet as mx
 
@@ -96,8 +96,12 @@ class LossMetric(ABC):
         self._name = name
         self._sum = 0.0
         self._num_inst = 0.0
+        # device-side accumulators of updates that have not been copied to the host yet
+        self._pending_sum = None  # type: Optional[mx.nd.NDArray]
+        self._pending_num_inst = None  # type: Optional[mx.nd.NDArray]
 
     def __repr__(self):
+        self._sync()
         return "%s(%.2f/%.2f=%.2f)" % (self.name, self._sum, self._num_inst, self.get())
 
     def __str__(self):
@@ -111,12 +115,51 @@ class LossMetric(ABC):
         self._sum += loss
         self._num_inst += num_samples
 
+    def update_ndarray(self, loss: mx.nd.NDArray, num_samples: mx.nd.NDArray):
+        """
+        Accumulates loss and number of samples given as NDArrays of shape (1,) without blocking on the device.
+        Values are summed in float32 on the device of the first update and copied to the host (with a single
+        synchronization) once the metric is read.
+        """
+        if self._pending_sum is None:
+            # copies, so the running sums can be updated in place
+            self._pending_sum = loss.astype('float32')
+            self._pending_num_inst = num_samples.astype('float32')
+        else:
+            self._pending_sum += loss.astype('float32', copy=False)
+            self._pending_num_inst += num_samples.astype('float32', copy=False)
+
+    def _sync(self):
+        if self._pending_sum is None:
+            return
+        pending = mx.nd.concat(self._pending_sum, self._pending_num_inst, dim=0).asnumpy()
+        self._pending_sum, self._pending_num_inst = None, None
+        self.update(float(pending[0]), float(pending[1]))
+
     def get(self) -> float:
+        self._sync()
         return self._sum / self._num_inst if self._num_inst else float('nan')
 
     def reset(self):
         self._sum = 0.0
         self._num_inst = 0.0
+        self._pending_sum = None
+        self._pending_num_inst = None
+
+
+def get_metric_values(metrics: Iterable[LossMetric]) -> Tuple[List[str], List[float]]:
+    """
+    Returns names and current values of the given metrics as two aligned lists.
+
+    :param metrics: Loss metrics.
+    :return: Tuple of metric names and metric values.
+    """
+    names = []  # type: List[str]
+    values = []  # type: List[float]
+    for metric in metrics:
+        names.append(metric.name)
+        values.append(metric.get())
+    return names, values
 
 
 class CrossEntropyLoss(Loss):
@@ -287,6 +287,18 @@ class SockeyeModel(mx.gluon.Block):
         super().save_parameters(fname, deduplicate=True)
         logging.info('Saved params to "%s"', fname)
 
+    def copy_parameters(self) -> Dict[str, mx.nd.NDArray]:
+        """
+        Returns CPU copies of the model parameters, keyed as in save_parameters(). The copies are
+        scheduled asynchronously and can be written to file with mx.nd.save() while training continues.
+
+        :return: Dictionary of parameter names to NDArrays.
+        """
+        params = self._collect_params_with_prefix()
+        # shared parameters are stored once, as in save_parameters(deduplicate=True)
+        unique_params = {param: name for name, param in params.items()}
+        return {name: param._reduce() for param, name in unique_params.items()}
+
     def load_parameters(self,
                         filename: str,
                         ctx: Union[mx.Context, List[mx.Context]] = None,
@@ -15,14 +15,20 @@
 Code for training
 """
 from collections import deque
+import errno
+import io
+import itertools
+import json
 import logging
 import os
 import pickle
 import random
 import shutil
+import struct
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from math import sqrt
-from typing import Callable, Dict, List, Optional, Iterable, Tuple, Union
+from typing import Any, Callable, cast, Dict, List, Optional, Iterable, Tuple, Union
 
 import mxnet as mx
 from mxnet.contrib import amp
@@ -41,6 +47,11 @@ from .config import Config
 from .model import SockeyeModel
 from .optimizers import OptimizerConfig
 
+try:
+    import mxboard
+except ImportError:
+    mxboard = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -94,12 +105,10 @@ class TrainState:
     Stores the state an EarlyStoppingTrainer instance.
     """
 
-    _pickle_slots = ['num_not_improved', 'epoch', 'checkpoint', 'best_checkpoint', 'batches',
-                     'updates', 'samples', 'gradient_norm', 'metrics', 'start_tic', '_tic_last_time_elapsed',
-                     '_time_elapsed', 'early_stopping_metric', 'best_metric', 'best_metric_history', 
-                     'best_checkpoint', 'converged', 'diverged']
- 
-    __slots__ = _pickle_slots + ['gradients']
+    __slots__ = ['num_not_improved', 'epoch', 'checkpoint', 'best_checkpoint', 'batches',
+                 'updates', 'samples', 'gradient_norm', 'metrics', 'start_tic', '_tic_last_time_elapsed',
+                 '_time_elapsed', 'early_stopping_metric', 'best_metric', 'best_metric_history',
+                 'converged', 'diverged']
 
     def __init__(self, early_stopping_metric: str) -> None:
         self.num_not_improved = 0
@@ -110,7 +119,6 @@ class TrainState:
         self.updates = 0
         self.samples = 0
         self.gradient_norm = None  # type: Optional[float]
-        self.gradients = {}  # type: Dict[str, List[mx.nd.NDArray]]
         # stores dicts of metric names & values for each checkpoint
         self.metrics = []  # type: List[Dict]
         self.start_tic = time.time()
@@ -124,23 +132,37 @@ class TrainState:
         self.converged = False
         self.diverged = False
 
-    def save(self, fname: str):
+    def serialize(self) -> bytes:
         """
-        Saves this training state to fname.
+        Returns this training state as JSON-encoded bytes.
         """
         self.update_time_elapsed()
-        with open(fname, "wb") as fp:
-            pickle.dump(self, fp)
+        return json.dumps(self.to_dict(), default=_json_default, separators=(',', ':')).encode('utf-8')
 
     @staticmethod
-    def load(fname: str) -> 'TrainState':
+    def deserialize(data: bytes) -> 'TrainState':
         """
-        Loads a training state from fname.
+        Returns a training state from bytes as returned by serialize().
         """
-        with open(fname, "rb") as fp:
-            state = pickle.load(fp)
-            state._tic_last_time_elapsed = time.time()
-            return state
+        if data[:1] == b'{':
+            state = TrainState.from_dict(json.loads(data.decode('utf-8')))
+        else:
+            # training states saved by earlier versions are pickled
+            state = pickle.loads(data)
+        state._tic_last_time_elapsed = time.time()
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = {k: getattr(self, k) for k in self.__slots__}
+        state['best_metric_history'] = list(self.best_metric_history)
+        return state
+
+    @staticmethod
+    def from_dict(state: Dict[str, Any]) -> 'TrainState':
+        train_state = TrainState.__new__(TrainState)
+        train_state.__setstate__(state)
+        train_state.best_metric_history = deque(train_state.best_metric_history)
+        return train_state
 
     def update_time_elapsed(self):
         current_time = time.time()
@@ -152,12 +174,20 @@ class TrainState:
         return self._time_elapsed
 
     def __getstate__(self):
-        return {k: getattr(self, k) for k in self._pickle_slots}
+        return {k: getattr(self, k) for k in self.__slots__}
 
     def __setstate__(self, state):
         for k, v in state.items():
             setattr(self, k, v)
-        self.gradients = {}
+
+
+def _json_default(obj: Any) -> Any:
+    """
+    Converts numpy scalars, which may appear in metric values, for json serialization.
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
 
 
 class GluonEarlyStoppingTrainer:
@@ -174,23 +204,51 @@ class GluonEarlyStoppingTrainer:
                  custom_metrics_logger: Optional[Callable] = None,
                  checkpoint_callback: Optional[Callable] = None) -> None:
         self.config = config
+        # paths in the output directory, which does not change during training
+        self._metrics_fname = os.path.join(config.output_dir, C.METRICS_NAME)
+        self._best_params_fname = os.path.join(config.output_dir, C.PARAMS_BEST_NAME)
+        self._best_params_temp_fname = os.path.join(config.output_dir, C.PARAMS_BEST_TEMP_NAME)
+        self._training_state_dirname = os.path.join(config.output_dir, C.TRAINING_STATE_DIRNAME)
+        self._training_state_temp_dirname = os.path.join(config.output_dir, C.TRAINING_STATE_TEMP_DIRNAME)
+        self._training_state_delete_dirname = os.path.join(config.output_dir, C.TRAINING_STATE_TEMP_DELETENAME)
+        self._best_optimizer_states_fname = os.path.join(config.output_dir, C.OPT_STATES_BEST)
         self.optimizer_config = optimizer_config
         self.model = sockeye_model
         self.trainer = trainer
         self.loss_functions = loss_functions
+        # training metrics of the loss functions, same order as self.loss_functions
+        self._loss_metrics = [lf.metric for lf in loss_functions]
         self.context = context
         self.dtype = dtype
         self.using_amp = using_amp
-        self._parallel = parallel.Parallel(len(context) if len(context) > 1 else 0,
-                                           ParallelModel(sockeye_model,
-                                                         loss_functions,
-                                                         trainer,
-                                                         using_amp=using_amp))
+        self._parallel_model = ParallelModel(sockeye_model, loss_functions, trainer, using_amp=using_amp)
+        self._parallel = parallel.Parallel(len(context) if len(context) > 1 else 0, self._parallel_model)
+        if len(context) == 1:
+            # no need to dispatch shards and reduce their outputs when training on a single device
+            self._forward_backward = self._forward_backward_single_device
+        else:
+            self._forward_backward = self._forward_backward_multi_device
         self.state = None  # type: Optional[TrainState]
         self._speedometer = Speedometer(frequency=C.MEASURE_SPEED_EVERY, auto_reset=False)
         self._custom_metrics_logger = custom_metrics_logger
         self._tflogger = TensorboardLogger(logdir=os.path.join(self.config.output_dir, C.TENSORBOARD_NAME))
         self.checkpoint_callback = checkpoint_callback
+        # improvement of the early stopping metric over the window of the last checkpoints
+        self._window_improvement = 0.
+        # number of batches between checkpoints
+        self._checkpoint_batches = self.config.checkpoint_interval * self.config.update_interval
+        # the common case of an update after every batch skips the gradient accumulation bookkeeping
+        if self.config.update_interval == 1:
+            self._step = self._step_update_every_batch
+        else:
+            self._step = self._step_accumulate_gradients
+        # checkpoint files are written in the background while training continues
+        self._checkpoint_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_params_write = None  # type: Optional[Future]
+        self._pending_training_state_write = None  # type: Optional[Future]
+        self._pending_metrics_write = None  # type: Optional[Future]
+        # the metrics file is rewritten once per run
+        self._metrics_file_in_sync = False
 
     def fit(self,
             train_iter: data_io.BaseParallelSampleIter,
@@ -211,9 +269,21 @@ class GluonEarlyStoppingTrainer:
             self.model.save_config(self.config.output_dir)
             self.model.save_version(self.config.output_dir)
             # self._save_training_state(train_iter)
-            # self._save_trainer_states(self.best_optimizer_states_fname)  # not saving due to deferred initialization
             logger.info("Training started.")
 
+        # the convergence check only needs the last max_num_checkpoint_not_improved + 1 best metrics
+        max_history = None
+        if self.config.max_num_checkpoint_not_improved is not None:
+            max_history = max(self.config.max_num_checkpoint_not_improved + 1, 1)
+        self.state.best_metric_history = deque(self.state.best_metric_history, maxlen=max_history)
+
+        # load the next batch onto the devices while the current one is processed. Not with Horovod: loading the next
+        # shard of a sharded iterator broadcasts on MPI.COMM_WORLD, and collectives must be issued in the same order on
+        # all workers. They are kept on the main thread, in order with the broadcasts at checkpoints.
+        prefetching_train_iter = None  # type: Optional[data_io.PrefetchingParallelSampleIter]
+        if not horovod_mpi.using_horovod():
+            train_iter = prefetching_train_iter = data_io.PrefetchingParallelSampleIter(train_iter, self.context)
+
         tic = time.time()
 
         if self.config.max_checkpoints is not None:
@@ -226,34 +296,39 @@ class GluonEarlyStoppingTrainer:
                         self.config.max_updates,
                         self.config.max_checkpoints)
 
+        # local references for the per-batch part of the loop, none of them change during training
+        state = self.state
+        step = self._step
+        max_epochs, max_updates, max_samples = self.config.max_epochs, self.config.max_updates, self.config.max_samples
+        checkpoint_batches = self._checkpoint_batches
+
         while True:
-            if self.config.max_epochs is not None and self.state.epoch == self.config.max_epochs:
-                logger.info("Maximum # of epochs (%s) reached.", self.config.max_epochs)
+            if max_epochs is not None and state.epoch == max_epochs:
+                logger.info("Maximum # of epochs (%s) reached.", max_epochs)
                 break
 
-            if self.config.max_updates is not None and self.state.updates == self.config.max_updates:
-                logger.info("Maximum # of updates (%s) reached.", self.config.max_updates)
+            if max_updates is not None and state.updates == max_updates:
+                logger.info("Maximum # of updates (%s) reached.", max_updates)
                 break
 
-            if self.config.max_samples is not None and self.state.samples >= self.config.max_samples:
-                logger.info("Maximum # of samples (%s) reached", self.config.max_samples)
+            if max_samples is not None and state.samples >= max_samples:
+                logger.info("Maximum # of samples (%s) reached", max_samples)
                 break
 
-            self._step(batch=train_iter.next())
+            step(batch=train_iter.next())
 
             if not train_iter.iter_next():
-                self.state.epoch += 1
+                state.epoch += 1
                 train_iter.reset()
 
-            if self.state.updates > 0 and self.state.batches % (
-                    self.config.checkpoint_interval * self.config.update_interval) == 0:
+            if state.updates > 0 and state.batches % checkpoint_batches == 0:
                 time_cost = time.time() - tic
                 self.state.checkpoint += 1
 
                 # (1) save parameters and evaluate on validation data
                 self._save_params()
 
-                train_metrics = [lf.metric for lf in self.loss_functions]
+                train_metrics = self._loss_metrics
 
                 logger.info("Checkpoint [%d]\tUpdates=%d Epoch=%d Samples=%d Time-cost=%.3f Updates/sec=%.3f",
                             self.state.checkpoint, self.state.updates, self.state.epoch,
@@ -261,24 +336,23 @@ class GluonEarlyStoppingTrainer:
                 logger.info('Checkpoint [%d]\t%s', self.state.checkpoint,
                             "\t".join("Train-%s" % str(metric) for metric in train_metrics))
 
+                # validation metrics synchronize on their own values once read, no global barrier is needed
                 val_metrics = self._evaluate(self.state.checkpoint, validation_iter, checkpoint_decoder)
 
-                mx.nd.waitall()
-
                 has_improved = self._determine_improvement(val_metrics)
                 self.state.converged = self._determine_convergence()
                 self.state.diverged = self._determine_divergence(val_metrics)
                 self._adjust_learning_rate(has_improved)
                 if has_improved:
                     self._update_best_params()
-                    self._save_trainer_states(self.best_optimizer_states_fname)
-                self._save_training_state(train_iter)
+                self._save_training_state(train_iter, save_best_optimizer_states=has_improved)
 
                 self._write_and_log_metrics(train_metrics=train_metrics, val_metrics=val_metrics)
                 for metric in train_metrics:
                     metric.reset()
 
                 if self.checkpoint_callback:
+                    self._wait_for_checkpoint_writes()
                     self.checkpoint_callback(self.state.checkpoint)
 
                 if self.config.max_seconds is not None and self.state.time_elapsed >= self.config.max_seconds:
@@ -297,18 +371,19 @@ class GluonEarlyStoppingTrainer:
 
         # Always keep the training state to allow continuing training with
         # different stopping criteria
-        self._cleanup(keep_training_state=True)
+        self._cleanup(prefetching_train_iter, keep_training_state=True)
         return self.state
 
-    def _forward_backward(self, batch: data_io.Batch):
+    def _forward_backward_multi_device(self, batch: data_io.Batch):
         """
         Performs forward-backward pass on a batch in data-parallel mode.
 
         :param batch: Current data batch.
         :return: List loss outputs (tuple of loss value and number of samples) for each loss function.
         """
-        # split batch into shards
-        batch = batch.split_and_load(ctx=self.context)
+        # split batch into shards, unless already done by the prefetching iterator
+        if not isinstance(batch.source, list):
+            batch = batch.split_and_load(ctx=self.context)
 
         # send sharded inputs to the backend
         for inputs, labels in batch.shards():
@@ -318,34 +393,53 @@ class GluonEarlyStoppingTrainer:
         # loss function of the form: (loss_value, num_samples).
         sharded_outputs = [self._parallel.get() for _ in range(len(self.context))]
 
-        # repack outputs into a list of loss_values (length = number of shards) for each loss function
-        sharded_outputs_per_loss_function = list(zip(*sharded_outputs))
+        return _reduce_shards(sharded_outputs, self.context[0])
 
-        # sum loss values (on the cpu) and number of samples for each loss function
-        output_per_loss_function = [
-            tuple(mx.nd.add_n(*(s.as_in_context(mx.cpu()) for s in shard)) for shard in zip(*outs)) for outs in
-            sharded_outputs_per_loss_function]
-        return output_per_loss_function
+    def _forward_backward_single_device(self, batch: data_io.Batch):
+        """
+        Performs forward-backward pass on a batch on a single device.
+
+        :param batch: Current data batch.
+        :return: List loss outputs (tuple of loss value and number of samples) for each loss function.
+        """
+        # load batch onto the device, unless already done by the prefetching iterator
+        if not isinstance(batch.source, list):
+            batch = batch.split_and_load(ctx=self.context)
+        shard, = batch.shards()
+        return self._parallel_model.forward_backward(shard)
+
+    def _step_update_every_batch(self, batch: data_io.Batch):
+        state = self.state
+        state.batches += 1
+        loss_outputs = self._forward_backward(batch)
+        self.trainer.step(batch_size=1)
+        state.updates += 1
+        self._update_metrics(batch, loss_outputs)
 
-    def _step(self, batch: data_io.Batch):
-        self.state.batches += 1
+    def _step_accumulate_gradients(self, batch: data_io.Batch):
+        state = self.state
+        state.batches += 1
         loss_outputs = self._forward_backward(batch)
-        if self.config.update_interval == 1 or self.state.batches % self.config.update_interval == 0:
+        update_interval = self.config.update_interval
+        if state.batches % update_interval == 0:
             # `step` rescales the gradients for the number of batches in this
             # update.
-            self.trainer.step(batch_size=self.config.update_interval)
-            if self.config.update_interval > 1:
-                # Multi-batch updates sum gradients for each batch instead of
-                # overwriting, so gradients must be manually zeroed after each
-                # update.
-                self.model.collect_params().zero_grad()
-            self.state.updates += 1
-
-        self.state.samples += batch.samples
-        for loss_func, (loss_value, num_samples) in zip(self.loss_functions, loss_outputs):
-            loss_func.metric.update(loss_value.asscalar(), num_samples.asscalar())
-        self._speedometer(self.state.epoch, self.state.batches,
-                          self.state.updates, batch.samples, batch.tokens, (lf.metric for lf in self.loss_functions))
+            self.trainer.step(batch_size=update_interval)
+            # Multi-batch updates sum gradients for each batch instead of
+            # overwriting, so gradients must be manually zeroed after each
+            # update.
+            self.model.collect_params().zero_grad()
+            state.updates += 1
+        self._update_metrics(batch, loss_outputs)
+
+    def _update_metrics(self, batch: data_io.Batch, loss_outputs: List[Tuple[mx.nd.NDArray, mx.nd.NDArray]]):
+        state = self.state
+        state.samples += batch.samples
+        loss_metrics = self._loss_metrics
+        # metrics accumulate on the device and only block once they are read (by the speedometer or at checkpoints)
+        for loss_metric, (loss_value, num_samples) in zip(loss_metrics, loss_outputs):
+            loss_metric.update_ndarray(loss_value, num_samples)
+        self._speedometer(state.epoch, state.batches, state.updates, batch.samples, batch.tokens, loss_metrics)
 
     def _evaluate(self, checkpoint: int, data_iter, checkpoint_decoder: Optional[CheckpointDecoder]) -> List[loss.LossMetric]:
         """
@@ -357,27 +451,23 @@ class GluonEarlyStoppingTrainer:
         val_metrics = [lf.create_metric() for lf in self.loss_functions]
         for batch in data_iter:
             batch = batch.split_and_load(ctx=self.context)
-            sharded_loss_outputs = []  # type: List[List[Tuple[mx.nd.NDArray, mx.nd.NDArray]]]
             for inputs, labels in batch.shards():
                 outputs = self.model(*inputs)  # type: Dict[str, mx.nd.NDArray]
-                loss_outputs = [loss_function(outputs, labels) for loss_function in self.loss_functions]
-                sharded_loss_outputs.append(loss_outputs)
-
-            # repack outputs into a list of loss_values (length = number of shards) for each loss function
-            sharded_loss_outputs_per_loss_function = list(zip(*sharded_loss_outputs))
-            # sum loss values (on the cpu) and number of samples for each loss function
-            output_per_loss_function = [tuple(mx.nd.add_n(*(s.as_in_context(mx.cpu()) for s in shard))
-                                        for shard in zip(*outs)) for outs in sharded_loss_outputs_per_loss_function]
-            # update validation metrics for batch
-            for loss_metric, (loss_value, num_samples) in zip(val_metrics, output_per_loss_function):
-                loss_metric.update(loss_value.asscalar(), num_samples.asscalar())
+                # fold shard outputs into the running sums of the validation metrics on the first device without
+                # blocking. Metrics are synchronized once they are read.
+                for loss_function, loss_metric in zip(self.loss_functions, val_metrics):
+                    loss_value, num_samples = loss_function(outputs, labels)
+                    loss_metric.update_ndarray(loss_value.as_in_context(self.context[0]),
+                                               num_samples.as_in_context(self.context[0]))
 
         # Optionally run the checkpoint decoder
         if checkpoint_decoder is not None:
             output_name = os.path.join(self.config.output_dir, C.DECODE_OUT_NAME % checkpoint)
             decoder_metrics = checkpoint_decoder.decode_and_evaluate(output_name=output_name)
+            val_metric_names = {metric.name for metric in val_metrics}
             for metric_name, metric_value in decoder_metrics.items():
-                assert metric_name not in val_metrics, "Duplicate validation metric %s" % metric_name
+                assert metric_name not in val_metric_names, "Duplicate validation metric %s" % metric_name
+                val_metric_names.add(metric_name)
                 metric = loss.LossMetric(name=metric_name)
                 metric.update(metric_value, num_samples=1)
                 val_metrics.append(metric)
@@ -390,49 +480,72 @@ class GluonEarlyStoppingTrainer:
     def _determine_improvement(self, val_metrics: List[loss.LossMetric]) -> bool:
         """
         Determines whether early stopping metric on validation data improved and updates best value and checkpoint in
-        the state.
+        the state. Also determines the improvement over the window of recent checkpoints for _determine_convergence().
         :param val_metrics: Validation metrics.
         :return: Whether model has improved on held-out data since last checkpoint.
         """
-        value = None
+        val_metric = {metric.name: metric for metric in val_metrics}.get(self.config.early_stopping_metric)
+        assert val_metric is not None, \
+            "Early stopping metric %s not found in validation metrics." % self.config.early_stopping_metric
+        value = val_metric.get()
         value_is_better = False
-        for val_metric in val_metrics:
-            if val_metric.name == self.config.early_stopping_metric:
-                value = val_metric.get()
-                # When using Horovod, the primary worker makes an authoritative
-                # check of whether metric value has improved and broadcasts the
-                # result to secondary workers.  Non-determinism in the order of
-                # GPU operations can lead to slight numeric variation across
-                # workers, causing potential desync if each worker makes its own
-                # check for key training decisions (reducing learning rate,
-                # early stopping, etc.).
-                if not horovod_mpi.using_horovod() or horovod_mpi.hvd.rank() == 0:
-                    # Horovod primary worker or not using Horovod: make
-                    # authoritative metric check.
-                    value_is_better = utils.metric_value_is_better(value,
-                                                                   self.state.best_metric,
-                                                                   self.config.early_stopping_metric)
-                if horovod_mpi.using_horovod():
-                    # Broadcast result across workers.
-                    value_is_better = horovod_mpi.MPI.COMM_WORLD.bcast(value_is_better, root=0)
-                if value_is_better:
-                    logger.info("Validation-%s improved to %f (delta=%f).", self.config.early_stopping_metric,
-                                value, abs(value - self.state.best_metric))
-                    self.state.best_metric = value
-                    self.state.best_checkpoint = self.state.checkpoint
-                    self.state.num_not_improved = 0
-        assert value is not None, "Early stopping metric %s not found in validation metrics." % self.config.early_stopping_metric
-        if not value_is_better:
+        window_improvement = 0.
+        # When using Horovod, the primary worker makes an authoritative
+        # check of whether metric value has improved and broadcasts the
+        # result to secondary workers.  Non-determinism in the order of
+        # GPU operations can lead to slight numeric variation across
+        # workers, causing potential desync if each worker makes its own
+        # check for key training decisions (reducing learning rate,
+        # early stopping, etc.).
+        is_primary = not horovod_mpi.using_horovod() or horovod_mpi.hvd.rank() == 0
+        if is_primary:
+            # Horovod primary worker or not using Horovod: make
+            # authoritative metric check.
+            value_is_better = utils.metric_value_is_better(value,
+                                                           self.state.best_metric,
+                                                           self.config.early_stopping_metric)
+            self._update_best_metric(value, value_is_better)
+            # The primary worker also computes the improvement over the window
+            # used for evaluating stopping, such that both decisions can be
+            # broadcast at once. As in _determine_convergence(), the history is
+            # only read for a non-negative max_num_checkpoint_not_improved.
+            if (self.config.max_num_checkpoint_not_improved is not None
+                    and 0 <= self.config.max_num_checkpoint_not_improved):
+                window_improvement = abs(self.state.best_metric - self.state.best_metric_history[0])
+        if horovod_mpi.using_horovod():
+            value_is_better, window_improvement = self._broadcast_checkpoint_decisions(value_is_better,
+                                                                                       window_improvement)
+            if not is_primary:
+                self._update_best_metric(value, value_is_better)
+        self._window_improvement = window_improvement
+
+        return value_is_better
+
+    def _update_best_metric(self, value: float, value_is_better: bool):
+        """
+        Updates best value, checkpoint, and metric history in the state given the early stopping metric value of the
+        current checkpoint.
+        """
+        if value_is_better:
+            logger.info("Validation-%s improved to %f (delta=%f).", self.config.early_stopping_metric,
+                        value, abs(value - self.state.best_metric))
+            self.state.best_metric = value
+            self.state.best_checkpoint = self.state.checkpoint
+            self.state.num_not_improved = 0
+        else:
             self.state.num_not_improved += 1
             logger.info("Validation-%s has not improved for %d checkpoints, best so far: %f",
                         self.config.early_stopping_metric, self.state.num_not_improved, self.state.best_metric)
-        # Update best metric history
+        # Update best metric history. The history is bounded, see fit().
         self.state.best_metric_history.append(self.state.best_metric)
-        if (self.config.max_num_checkpoint_not_improved is not None
-                and len(self.state.best_metric_history) > self.config.max_num_checkpoint_not_improved + 1):
-            self.state.best_metric_history.popleft()
 
-        return value_is_better
+    @staticmethod
+    def _broadcast_checkpoint_decisions(value_is_better: bool, window_improvement: float) -> Tuple[bool, float]:
+        """
+        Broadcasts the decisions of the primary Horovod worker for the current checkpoint to all workers with a single
+        collective call.
+        """
+        return horovod_mpi.MPI.COMM_WORLD.bcast((value_is_better, window_improvement), root=0)
 
     def _determine_convergence(self) -> bool:
         """
@@ -458,13 +571,10 @@ class GluonEarlyStoppingTrainer:
         if (self.config.max_num_checkpoint_not_improved is not None
                 and 0 <= self.config.max_num_checkpoint_not_improved
                 and self.state.checkpoint >= self.config.max_num_checkpoint_not_improved):
-            # When using Horovod, the primary worker makes the authoritative
-            # calculation of improvement over the window for evaluating stopping
-            window_improvement = 0.
-            if not horovod_mpi.using_horovod() or horovod_mpi.hvd.rank() == 0:
-                window_improvement = abs(self.state.best_metric - self.state.best_metric_history[0])
-            if horovod_mpi.using_horovod():
-                window_improvement = horovod_mpi.MPI.COMM_WORLD.bcast(window_improvement, root=0)
+            # Improvement over the window for evaluating stopping. When using
+            # Horovod, this is the authoritative value of the primary worker,
+            # broadcast in _determine_improvement().
+            window_improvement = self._window_improvement
 
             # <= to correctly handle threshold == 0
             if window_improvement <= self.config.checkpoint_improvement_threshold:
@@ -483,11 +593,8 @@ class GluonEarlyStoppingTrainer:
         True if last perplexity is infinite or >2*target_vocab_size.
         """
         # (5) detect divergence with respect to the perplexity value at the last checkpoint
-        last_ppl = float('nan')
-        for metric in val_metrics:
-            if metric.name == C.PERPLEXITY:
-                last_ppl = metric.get()
-                break
+        ppl_metric = {metric.name: metric for metric in val_metrics}.get(C.PERPLEXITY)
+        last_ppl = ppl_metric.get() if ppl_metric is not None else float('nan')
         # using a double of uniform distribution's value as a threshold
         if not np.isfinite(last_ppl) or last_ppl > 2 * self.model.config.vocab_target_size:
             logger.warning("Model optimization diverged. Last checkpoint's perplexity: %f", last_ppl)
@@ -517,7 +624,8 @@ class GluonEarlyStoppingTrainer:
     def _write_and_log_metrics(self, train_metrics: Iterable[loss.LossMetric], val_metrics: Iterable[loss.LossMetric]):
         """
         Updates metrics for current checkpoint.
-        Writes all metrics to the metrics file, optionally logs to tensorboard, and sends metrics to custom logger.
+        Writes metrics to the metrics file in the background, optionally logs to tensorboard, and sends metrics to
+        custom logger.
         """
         data = {"epoch": self.state.epoch,
                 "learning-rate": (self.trainer.learning_rate if self.trainer.optimizer.lr_scheduler is None
@@ -535,7 +643,15 @@ class GluonEarlyStoppingTrainer:
             data["%s-val" % metric.name] = metric.get()
 
         self.state.metrics.append(data)
-        utils.write_metrics_file(self.state.metrics, self.metrics_fname)
+        self._wait_for_metrics_write()
+        if self._metrics_file_in_sync:
+            self._pending_metrics_write = self._checkpoint_executor.submit(utils.append_metrics_file, data,
+                                                                           len(self.state.metrics), self.metrics_fname)
+        else:
+            # when resuming, the file may contain metrics of checkpoints that are not part of the training state
+            self._pending_metrics_write = self._checkpoint_executor.submit(utils.write_metrics_file,
+                                                                           list(self.state.metrics), self.metrics_fname)
+            self._metrics_file_in_sync = True
 
         self._tflogger.log_metrics(metrics=data, checkpoint=self.state.checkpoint)
         safe_custom_metrics_logger(logging_function=self._custom_metrics_logger,
@@ -547,84 +663,212 @@ class GluonEarlyStoppingTrainer:
         Updates the params.best link to the latest best parameter file.
         """
         actual_best_params_fname = C.PARAMS_NAME % self.state.best_checkpoint
-        if os.path.lexists(self.best_params_fname):
-            os.remove(self.best_params_fname)
-        os.symlink(actual_best_params_fname, self.best_params_fname)
+        # Create the new link under a temporary name and atomically replace the existing link, such that params.best
+        # always exists
+        tmp_best_params_fname = self._best_params_temp_fname
+        try:
+            os.symlink(actual_best_params_fname, tmp_best_params_fname)
+        except FileExistsError:
+            # left over from an aborted process
+            os.remove(tmp_best_params_fname)
+            os.symlink(actual_best_params_fname, tmp_best_params_fname)
+        os.replace(tmp_best_params_fname, self.best_params_fname)
         logger.info("'%s' now points to '%s'", self.best_params_fname, actual_best_params_fname)
 
     def _save_params(self):
         """
         Saves model parameters at current checkpoint and optionally cleans up older parameter files to save disk space.
+        Parameters are copied on the main thread and written to disk in the background.
         """
-        self.model.save_parameters(self.current_params_fname)
+        self._wait_for_params_write()
+        self._pending_params_write = self._checkpoint_executor.submit(_write_params,
+                                                                      self.current_params_fname,
+                                                                      self.model.copy_parameters())
+        # the pending training state may still link a parameter file that the cleanup would remove
+        self._wait_for_training_state_write()
         utils.cleanup_params_files(self.config.output_dir, self.config.max_params_files_to_keep, self.state.checkpoint,
                                    self.state.best_checkpoint, self.config.keep_initializations)
 
-    def _save_trainer_states(self, fname):
-        trainer_save_states_no_dump_optimizer(self.trainer, fname)
-        logger.info('Saved optimizer states to "%s"', fname)
+    def _wait_for_params_write(self):
+        """
+        Blocks until the parameter file of the last checkpoint is written. Re-raises errors from the writer thread.
+        """
+        if self._pending_params_write is not None:
+            self._pending_params_write.result()
+            self._pending_params_write = None
+
+    def _wait_for_metrics_write(self):
+        """
+        Blocks until the metrics file is written. Re-raises errors from the writer thread.
+        """
+        if self._pending_metrics_write is not None:
+            self._pending_metrics_write.result()
+            self._pending_metrics_write = None
+
+    def _wait_for_training_state_write(self):
+        """
+        Blocks until the training state directory is written. Re-raises errors from the writer thread.
+        """
+        if self._pending_training_state_write is not None:
+            self._pending_training_state_write.result()
+            self._pending_training_state_write = None
+
+    def _wait_for_checkpoint_writes(self):
+        """
+        Blocks until all files of the last checkpoint written in the background are complete.
+        """
+        self._wait_for_params_write()
+        self._wait_for_training_state_write()
+        self._wait_for_metrics_write()
 
     def _load_trainer_states(self, fname):
+        # optimizer states may still be written in the background
+        self._wait_for_training_state_write()
         self.trainer.load_states(fname)
         logger.info('Loaded optimizer states from "%s"', fname)
 
-    def _save_training_state(self, train_iter: data_io.BaseParallelSampleIter):
+    def _save_training_state(self, train_iter: data_io.BaseParallelSampleIter, save_best_optimizer_states: bool):
         """
-        Saves current training state.
+        Saves current training state. The state is copied on the main thread and written to disk in the background.
+
+        :param train_iter: Training data iterator.
+        :param save_best_optimizer_states: Whether to save the optimizer states as best optimizer states as well.
         """
+        # at most one training state is written at a time
+        self._wait_for_training_state_write()
+
         # Create temporary directory for storing the state of the optimization process
-        training_state_dirname = os.path.join(self.config.output_dir, C.TRAINING_STATE_TEMP_DIRNAME)
-        if not os.path.exists(training_state_dirname):
+        training_state_dirname = self._training_state_temp_dirname
+        try:
             os.mkdir(training_state_dirname)
+        except FileExistsError:
+            # previous training state: files written by every save are overwritten, all others are removed such that
+            # no stale file of an older checkpoint or format remains next to the new training state
+            for entry in os.scandir(training_state_dirname):
+                if entry.name in _OVERWRITTEN_TRAINING_STATE_NAMES:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
 
-        # (1) Parameters: link current file
-        params_base_fname = C.PARAMS_NAME % self.state.checkpoint
-        params_file = os.path.join(training_state_dirname, C.TRAINING_STATE_PARAMS_NAME)
-        if os.path.exists(params_file):
-            os.unlink(params_file)
-        os.symlink(os.path.join("..", params_base_fname), params_file)
+        # (1) Data iterator: saved right away, training continues with the next batch
+        train_iter.save_state(os.path.join(training_state_dirname, C.BUCKET_ITER_STATE_NAME))
 
         # (2) Optimizer states
-        opt_state_fname = os.path.join(training_state_dirname, C.OPT_STATES_LAST)
-        self._save_trainer_states(opt_state_fname)
+        opt_states = trainer_get_states_no_dump_optimizer(self.trainer)
 
-        # (3) Data iterator
-        train_iter.save_state(os.path.join(training_state_dirname, C.BUCKET_ITER_STATE_NAME))
-
-        # (4) Random generators
+        # (3) Random generators
         # RNG states: python's random and np.random provide functions for
         # storing the state, mxnet does not, but inside our code mxnet's RNG is
         # not used AFAIK
-        with open(os.path.join(training_state_dirname, C.RNG_STATE_NAME), "wb") as fp:
-            pickle.dump(random.getstate(), fp)
-            pickle.dump(np.random.get_state(), fp)
+        rng_states = pickle.dumps(random.getstate(), protocol=pickle.HIGHEST_PROTOCOL) + _serialize_numpy_rng_state()
 
-        # (5) Training state
-        self.state.save(os.path.join(training_state_dirname, C.TRAINING_STATE_NAME))
+        # (4) Training state
+        train_state = self.state.serialize()
 
-        # (6) AMP loss scaler state
+        # (5) AMP loss scaler state
+        amp_loss_scaler_state = None  # type: Optional[bytes]
         if self.using_amp:
-            with open(os.path.join(training_state_dirname, C.AMP_LOSS_SCALER_STATE_NAME), "wb") as fp:
-                pickle.dump([self.trainer._amp_loss_scaler._loss_scale,
-                             self.trainer._amp_loss_scaler._next_loss_scale,
-                             self.trainer._amp_loss_scaler._unskipped], fp)
-
-        # First we rename the existing directory to minimize the risk of state
-        # loss if the process is aborted during deletion (which will be slower
-        # than directory renaming)
-        delete_training_state_dirname = os.path.join(self.config.output_dir, C.TRAINING_STATE_TEMP_DELETENAME)
-        if os.path.exists(self.training_state_dirname):
-            os.rename(self.training_state_dirname, delete_training_state_dirname)
-        os.rename(training_state_dirname, self.training_state_dirname)
-        if os.path.exists(delete_training_state_dirname):
+            amp_loss_scaler_state = pickle.dumps([self.trainer._amp_loss_scaler._loss_scale,
+                                                  self.trainer._amp_loss_scaler._next_loss_scale,
+                                                  self.trainer._amp_loss_scaler._unskipped],
+                                                 protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._pending_training_state_write = self._checkpoint_executor.submit(self._write_training_state,
+                                                                              training_state_dirname,
+                                                                              C.PARAMS_NAME % self.state.checkpoint,
+                                                                              opt_states,
+                                                                              rng_states,
+                                                                              train_state,
+                                                                              amp_loss_scaler_state,
+                                                                              save_best_optimizer_states,
+                                                                              self._pending_params_write)
+
+    def _write_training_state(self,
+                              training_state_dirname: str,
+                              params_base_fname: str,
+                              opt_states: bytes,
+                              rng_states: bytes,
+                              train_state: bytes,
+                              amp_loss_scaler_state: Optional[bytes],
+                              save_best_optimizer_states: bool,
+                              params_write: Optional[Future]):
+        """
+        Writes a training state copied by _save_training_state() and replaces the previous training state directory.
+        Runs on the checkpoint writer thread.
+        """
+        # the training state must not reference an incomplete parameter file. The parameters were submitted to the
+        # same writer thread before, so this re-raises errors of the parameter write only.
+        if params_write is not None:
+            params_write.result()
+
+        # (1) Parameters: link current file. A hard link is preferred as it stays valid when the parameter file in
+        # the output folder is removed later on. The link is created under a temporary name and then moved into place.
+        params_file = os.path.join(training_state_dirname, C.TRAINING_STATE_PARAMS_NAME)
+        params_temp_file = os.path.join(training_state_dirname, C.TRAINING_STATE_PARAMS_TEMP_NAME)
+        try:
+            os.unlink(params_temp_file)
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(os.path.join(self.config.output_dir, params_base_fname), params_temp_file)
+        except OSError as e:
+            if e.errno not in _HARD_LINK_UNSUPPORTED_ERRNOS:
+                raise
+            # e.g. file systems without hard links
+            os.symlink(os.path.join("..", params_base_fname), params_temp_file)
+        os.replace(params_temp_file, params_file)
+
+        # (2) Optimizer states
+        opt_state_fname = os.path.join(training_state_dirname, C.OPT_STATES_LAST)
+        _write_file_durably(opt_state_fname, opt_states)
+        logger.info('Saved optimizer states to "%s"', opt_state_fname)
+        if save_best_optimizer_states:
+            # same serialized states, written to the output directory
+            _write_file_durably(self.best_optimizer_states_fname, opt_states)
+            logger.info('Saved optimizer states to "%s"', self.best_optimizer_states_fname)
+
+        # (3) Data iterator: written by the training thread
+        for entry in os.scandir(training_state_dirname):
+            if entry.name.startswith(C.BUCKET_ITER_STATE_NAME) and entry.is_file(follow_symlinks=False):
+                _fsync_path(entry.path)
+
+        # (4) Random generators, training state and AMP loss scaler state: small, written as a single file
+        sections = [(_META_RNG, rng_states), (_META_TRAINING_STATE, train_state)]
+        if amp_loss_scaler_state is not None:
+            sections.append((_META_AMP_LOSS_SCALER, amp_loss_scaler_state))
+        _write_file_durably(os.path.join(training_state_dirname, C.TRAINING_STATE_META_NAME), _pack_sections(sections))
+
+        # persist the directory entries before the new state replaces the previous one
+        _fsync_path(training_state_dirname)
+
+        # A non-empty directory cannot be replaced by rename, so the existing
+        # directory is moved aside first. It is not deleted but becomes the
+        # temporary directory of the next training state, which overwrites or
+        # removes its files.
+        delete_training_state_dirname = self._training_state_delete_dirname
+        moved_aside = True
+        try:
+            os.replace(self.training_state_dirname, delete_training_state_dirname)
+        except FileNotFoundError:
+            # first training state
+            moved_aside = False
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+            # non-empty directory left over from an aborted process
+            shutil.rmtree(delete_training_state_dirname)
+            os.replace(self.training_state_dirname, delete_training_state_dirname)
+        os.replace(training_state_dirname, self.training_state_dirname)
+        if moved_aside:
+            os.replace(delete_training_state_dirname, training_state_dirname)
+            # the hard link of the previous training state would keep its parameter file on disk after cleanup
             try:
-                shutil.rmtree(delete_training_state_dirname)
+                os.unlink(os.path.join(training_state_dirname, C.TRAINING_STATE_PARAMS_NAME))
             except FileNotFoundError:
-                # This can be occur on file systems with higher latency, such as
-                # distributed file systems.  While repeated occurrences of this
-                # warning may indicate a problem, seeing one or two warnings
-                # during training is usually fine.
-                logger.warning('Directory has already been removed: %s', delete_training_state_dirname)
+                pass
+        _fsync_path(self.config.output_dir)
 
     def _load_training_state(self, train_iter: data_io.BaseParallelSampleIter):
         """
@@ -642,29 +886,48 @@ class GluonEarlyStoppingTrainer:
         # (3) Data Iterator
         train_iter.load_state(os.path.join(self.training_state_dirname, C.BUCKET_ITER_STATE_NAME))
 
-        # (4) Random generators
+        # (4) Random generators, training state and AMP loss scaler state
+        try:
+            with open(os.path.join(self.training_state_dirname, C.TRAINING_STATE_META_NAME), "rb") as fp:
+                sections = _unpack_sections(fp.read())
+        except FileNotFoundError:
+            # training states saved by earlier versions store them in separate files
+            sections = {}
+            for name, fname in ((_META_RNG, C.RNG_STATE_NAME),
+                                (_META_TRAINING_STATE, C.TRAINING_STATE_NAME),
+                                (_META_AMP_LOSS_SCALER, C.AMP_LOSS_SCALER_STATE_NAME)):
+                if name == _META_AMP_LOSS_SCALER and not self.using_amp:
+                    continue
+                with open(os.path.join(self.training_state_dirname, fname), "rb") as fp:
+                    sections[name] = fp.read()
+
         # RNG states: python's random and np.random provide functions for
         # storing the state, mxnet does not, but inside our code mxnet's RNG is
         # not used AFAIK
-        with open(os.path.join(self.training_state_dirname, C.RNG_STATE_NAME), "rb") as fp:
-            random.setstate(pickle.load(fp))
-            np.random.set_state(pickle.load(fp))
+        rng_states = sections[_META_RNG]
+        python_rng_state = io.BytesIO(rng_states)
+        random.setstate(pickle.load(python_rng_state))
+        _load_numpy_rng_state(rng_states, offset=python_rng_state.tell())
 
-        # (5) Training state
-        self.state = TrainState.load(os.path.join(self.training_state_dirname, C.TRAINING_STATE_NAME))
+        self.state = TrainState.deserialize(sections[_META_TRAINING_STATE])
 
-        # (6) AMP loss scaler state
         if self.using_amp:
             # Load loss scaler state
-            with open(os.path.join(self.training_state_dirname, C.AMP_LOSS_SCALER_STATE_NAME), "rb") as fp:
-                (self.trainer._amp_loss_scaler._loss_scale,
-                 self.trainer._amp_loss_scaler._next_loss_scale,
-                 self.trainer._amp_loss_scaler._unskipped) = pickle.load(fp)
+            (self.trainer._amp_loss_scaler._loss_scale,
+             self.trainer._amp_loss_scaler._next_loss_scale,
+             self.trainer._amp_loss_scaler._unskipped) = pickle.loads(sections[_META_AMP_LOSS_SCALER])
 
-    def _cleanup(self, keep_training_state=False):
+    def _cleanup(self, train_iter: Optional[data_io.PrefetchingParallelSampleIter] = None, keep_training_state=False):
         """
         Cleans parameter files, training state directory and waits for remaining decoding processes.
+        Also stops prefetching of train_iter, if given.
         """
+        if train_iter is not None:
+            train_iter.close()
+        self._wait_for_checkpoint_writes()
+        self._checkpoint_executor.shutdown()
+        # previous training state, kept for reuse by the next checkpoint
+        shutil.rmtree(self._training_state_temp_dirname, ignore_errors=True)
         utils.cleanup_params_files(self.config.output_dir, self.config.max_params_files_to_keep,
                                    self.state.checkpoint, self.state.best_checkpoint, self.config.keep_initializations)
 
@@ -676,7 +939,7 @@ class GluonEarlyStoppingTrainer:
 
     @property
     def metrics_fname(self) -> str:
-        return os.path.join(self.config.output_dir, C.METRICS_NAME)
+        return self._metrics_fname
 
     @property
     def current_params_fname(self) -> str:
@@ -684,15 +947,166 @@ class GluonEarlyStoppingTrainer:
 
     @property
     def best_params_fname(self) -> str:
-        return os.path.join(self.config.output_dir, C.PARAMS_BEST_NAME)
+        return self._best_params_fname
 
     @property
     def training_state_dirname(self) -> str:
-        return os.path.join(self.config.output_dir, C.TRAINING_STATE_DIRNAME)
+        return self._training_state_dirname
 
     @property
     def best_optimizer_states_fname(self) -> str:
-        return os.path.join(self.config.output_dir, C.OPT_STATES_BEST)
+        return self._best_optimizer_states_fname
+
+
+def _write_params(fname: str, params: Dict[str, mx.nd.NDArray]):
+    mx.nd.save(fname, params)
+    _fsync_path(fname)
+    logger.info('Saved params to "%s"', fname)
+
+
+# os.link errors for which the parameters of the training state are linked with a symlink instead
+_HARD_LINK_UNSUPPORTED_ERRNOS = frozenset([errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP])
+
+# files of a training state directory that every save overwrites
+_OVERWRITTEN_TRAINING_STATE_NAMES = frozenset([C.OPT_STATES_LAST, C.TRAINING_STATE_META_NAME])
+
+# Data larger than this, e.g. optimizer states of large models, is written in chunks by several threads
+_WRITE_CHUNK_SIZE = 64 * 1024 * 1024
+_WRITE_NUM_THREADS = 4
+
+
+def _write_file_durably(fname: str, data: bytes):
+    """
+    Writes data to fname and flushes it to the storage device. The data is written unbuffered, directly from the
+    given bytes. Large data is written concurrently in chunks to the positions they take in the file.
+    """
+    fd = os.open(fname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(data)
+        if len(view) > _WRITE_CHUNK_SIZE and hasattr(os, 'pwrite'):
+            with ThreadPoolExecutor(max_workers=_WRITE_NUM_THREADS) as executor:
+                chunk_writes = [executor.submit(_write_chunk, fd, view[offset:offset + _WRITE_CHUNK_SIZE], offset)
+                                for offset in range(0, len(view), _WRITE_CHUNK_SIZE)]
+                for chunk_write in chunk_writes:
+                    chunk_write.result()
+        else:
+            while view:
+                view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_chunk(fd: int, view: memoryview, offset: int):
+    """
+    Writes view to the open file fd, starting at offset. Does not change the file position.
+    """
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _fsync_path(path: str):
+    """
+    Flushes a file written by other code, or the entries of a directory, to the storage device.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# section names of the training state meta file
+_META_RNG = 'rng'
+_META_TRAINING_STATE = 'state'
+_META_AMP_LOSS_SCALER = 'amp'
+
+
+def _pack_sections(sections: List[Tuple[str, bytes]]) -> bytes:
+    """
+    Packs named sections into a single buffer. Each section is stored as its name length (uint32), the name, its
+    payload length (uint64) and the payload.
+    """
+    parts = []  # type: List[bytes]
+    for name, payload in sections:
+        encoded_name = name.encode('utf-8')
+        parts.extend((struct.pack('<I', len(encoded_name)), encoded_name, struct.pack('<Q', len(payload)), payload))
+    return b''.join(parts)
+
+
+def _unpack_sections(data: bytes) -> Dict[str, bytes]:
+    """
+    Returns the named sections of a buffer packed by _pack_sections().
+    """
+    sections = {}  # type: Dict[str, bytes]
+    offset = 0
+    while offset < len(data):
+        utils.check_condition(offset + 4 <= len(data), "Truncated training state section header")
+        name_length, = struct.unpack_from('<I', data, offset)
+        offset += 4
+        utils.check_condition(offset + name_length + 8 <= len(data), "Truncated training state section header")
+        name = data[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+        payload_length, = struct.unpack_from('<Q', data, offset)
+        offset += 8
+        utils.check_condition(offset + payload_length <= len(data), "Truncated training state section '%s'" % name)
+        sections[name] = data[offset:offset + payload_length]
+        offset += payload_length
+    return sections
+
+
+# numpy's RNG state is stored as this header, the raw MT19937 key array, and the key position and Gaussian cache
+_NUMPY_RNG_STATE_HEADER = b'MT19\x00'
+_NUMPY_RNG_STATE_KEY_SIZE = 624
+_NUMPY_RNG_STATE_FORMAT = '<iid'
+
+
+def _serialize_numpy_rng_state() -> bytes:
+    """
+    Returns the state of numpy's global RNG without going through pickle.
+    """
+    algorithm, keys, pos, has_gauss, cached_gaussian = cast(Tuple[str, np.ndarray, int, int, float],
+                                                            np.random.get_state())
+    assert algorithm == 'MT19937' and keys.size == _NUMPY_RNG_STATE_KEY_SIZE
+    return b''.join((_NUMPY_RNG_STATE_HEADER,
+                     keys.astype('<u4', copy=False).tobytes(),
+                     struct.pack(_NUMPY_RNG_STATE_FORMAT, pos, has_gauss, cached_gaussian)))
+
+
+def _load_numpy_rng_state(data: bytes, offset: int = 0):
+    """
+    Restores the state of numpy's global RNG from data, starting at offset. The key array is read in place, without
+    copying. Supports states pickled by earlier versions.
+    """
+    if data[offset:offset + len(_NUMPY_RNG_STATE_HEADER)] != _NUMPY_RNG_STATE_HEADER:
+        np.random.set_state(pickle.loads(data[offset:]))
+        return
+    offset += len(_NUMPY_RNG_STATE_HEADER)
+    keys = np.frombuffer(data, dtype='<u4', count=_NUMPY_RNG_STATE_KEY_SIZE, offset=offset)
+    offset += keys.nbytes
+    pos, has_gauss, cached_gaussian = struct.unpack_from(_NUMPY_RNG_STATE_FORMAT, data, offset)
+    np.random.set_state(('MT19937', keys, pos, has_gauss, cached_gaussian))
+
+
+def _reduce_shards(sharded_outputs: List[List[Tuple[mx.nd.NDArray, mx.nd.NDArray]]],
+                   ctx: mx.context.Context) -> List[Tuple[mx.nd.NDArray, mx.nd.NDArray]]:
+    """
+    Sums loss values and number of samples of each loss function across shards on a single device.
+    This avoids a device-to-host copy per shard; the sums are only copied to the host once the metrics are read.
+
+    :param sharded_outputs: Loss outputs (tuple of loss value and number of samples) of each loss function, per shard.
+    :param ctx: Context to sum on, usually the first device.
+    :return: Summed loss outputs for each loss function.
+    """
+    if len(sharded_outputs) == 1:
+        return [(loss_value.as_in_context(ctx), num_samples.as_in_context(ctx))
+                for loss_value, num_samples in sharded_outputs[0]]
+    # repack outputs into loss values and number of samples (length = number of shards) for each loss function
+    return [(mx.nd.add_n(*(loss_value.as_in_context(ctx) for loss_value in loss_values)),
+             mx.nd.add_n(*(num_samples.as_in_context(ctx) for num_samples in num_samples_per_shard)))
+            for loss_values, num_samples_per_shard in (zip(*outs) for outs in zip(*sharded_outputs))]
 
 
 class ParallelModel(parallel.Parallelizable):
@@ -715,41 +1129,59 @@ class ParallelModel(parallel.Parallelizable):
         with mx.autograd.record():
             outputs = self.model(*inputs)  # type: Dict[str, mx.nd.NDArray]
             loss_outputs = [loss_function(outputs, labels) for loss_function in self.loss_functions]
-            loss_values = (v for v, _ in loss_outputs)
-            sum_losses = mx.nd.add_n(*loss_values)
+            loss_values = [v for v, _ in loss_outputs]
             if self.using_amp:
                 # AMP applies dynamic loss scaling to the losses (scale up) and
                 # the Trainer (scale down).
-                with amp.scale_loss(sum_losses, self.trainer) as scaled_loss:
-                    mx.autograd.backward(scaled_loss)
+                with amp.scale_loss(loss_values, self.trainer) as scaled_losses:
+                    mx.autograd.backward(scaled_losses)
             else:
-                # backward on the sum of losses, weights are defined in the loss blocks themselves.
-                sum_losses.backward()
+                # backward on all losses at once, which sums their gradients. Weights are defined in the loss blocks
+                # themselves.
+                mx.autograd.backward(loss_values)
         return loss_outputs
 
 
+# SummaryWriters by log directory, shared by all TensorboardLoggers of a process. Each writer holds an open event
+# file and a background thread flushing it.
+_SUMMARY_WRITERS = {}  # type: Dict[str, Any]
+
+
+def _get_summary_writer(logdir: str):
+    """
+    Returns the SummaryWriter for logdir, creating it on first use.
+    """
+    logdir = os.path.abspath(logdir)
+    writer = _SUMMARY_WRITERS.get(logdir)
+    if writer is None:
+        writer = _SUMMARY_WRITERS[logdir] = mxboard.SummaryWriter(logdir=logdir, flush_secs=60, verbose=False)
+    return writer
+
+
 class TensorboardLogger:
     """
     Thin wrapper for MXBoard API to log training events.
-    Flushes logging events to disk every 60 seconds.
+    Flushes logging events to disk every 60 seconds. Loggers for the same directory share a single writer.
 
     :param logdir: Directory to write Tensorboard event files to.
     :param source_vocab: Optional source vocabulary to log source embeddings.
     :param target_vocab: Optional target vocabulary to log target and output embeddings.
+    :param histogram_every: Log histograms of NDArray metrics only every this many checkpoints.
     """
 
     def __init__(self,
                  logdir: str,
                  source_vocab: Optional[vocab.Vocab] = None,
-                 target_vocab: Optional[vocab.Vocab] = None) -> None:
+                 target_vocab: Optional[vocab.Vocab] = None,
+                 histogram_every: int = 10) -> None:
         self.logdir = logdir
+        self.histogram_every = histogram_every
         self.source_labels = vocab.get_ordered_tokens_from_vocab(source_vocab) if source_vocab is not None else None
         self.target_labels = vocab.get_ordered_tokens_from_vocab(target_vocab) if target_vocab is not None else None
-        try:
-            import mxboard
+        if mxboard is not None:
             logger.info("Logging training events for Tensorboard at '%s'", self.logdir)
-            self._writer = mxboard.SummaryWriter(logdir=self.logdir, flush_secs=60, verbose=False)
-        except ImportError:
+            self._writer = _get_summary_writer(self.logdir)
+        else:
             logger.info("mxboard not found. Consider 'pip install mxboard' to log events to Tensorboard.")
             self._writer = None
 
@@ -757,12 +1189,24 @@ class TensorboardLogger:
         if self._writer is None:
             return
 
+        # histograms scan full arrays and are only logged every few checkpoints
+        log_histograms = checkpoint % self.histogram_every == 0
+        # check all histograms for infinite data with a single synchronization
+        histograms = [name for name, value in metrics.items() if isinstance(value, mx.nd.NDArray)]
+        finite = {}  # type: Dict[str, bool]
+        if histograms and log_histograms:
+            all_finite = mx.nd.concat(*(mx.nd.contrib.isfinite(metrics[name]).min().as_in_context(mx.cpu())
+                                        for name in histograms), dim=0).asnumpy()
+            finite = dict(zip(histograms, all_finite.astype(bool)))
+
         for name, value in metrics.items():
             if isinstance(value, mx.nd.NDArray):
-                if mx.nd.contrib.isfinite(value).sum().asscalar() == value.size:
+                if not log_histograms:
+                    continue
+                if finite[name]:
                     self._writer.add_histogram(tag=name, values=value, bins=100, global_step=checkpoint)
                 else:
-                    logger.warning("Histogram of %s not logged to tensorboard because of infinite data.")
+                    logger.warning("Histogram of %s not logged to tensorboard because of infinite data.", name)
             elif value is None:
                 continue
             else:
@@ -804,6 +1248,8 @@ class Speedometer:
         self.samples = 0
         self.tokens = 0
         self.msg = 'Epoch[%d] Batch [%d]\tSpeed: %.2f samples/sec %.2f tokens/sec %.2f updates/sec'
+        # log messages by number of metrics
+        self._msgs = {}  # type: Dict[int, str]
 
     def __call__(self, epoch: int, batches: int, updates: int, samples: int,
                  tokens: int, metrics: Optional[Iterable[loss.LossMetric]] = None):
@@ -816,7 +1262,7 @@ class Speedometer:
 
         if self.init:
             if count % self.frequency == 0:
-                toc = (time.time() - self.tic)
+                toc = (time.perf_counter() - self.tic)
                 update_interval = batches / max(1, updates)
                 updates_per_sec = self.frequency / update_interval / toc
                 samples_per_sec = self.samples / toc
@@ -825,21 +1271,24 @@ class Speedometer:
                 self.tokens = 0
 
                 if metrics is not None:
-                    metric_values = []  # type: List[Tuple[str, float]]
-                    for metric in metrics:
-                        metric_values.append((metric.name, metric.get()))
-                        if self.auto_reset:
+                    metrics = list(metrics)
+                    names, values = loss.get_metric_values(metrics)
+                    if self.auto_reset:
+                        for metric in metrics:
                             metric.reset()
-                    logger.info(self.msg + '\t%s=%f' * len(metric_values),
-                                epoch, count, samples_per_sec, tokens_per_sec, updates_per_sec, *sum(metric_values, ()))
+                    msg = self._msgs.get(len(names))
+                    if msg is None:
+                        msg = self._msgs[len(names)] = self.msg + '\t%s=%f' * len(names)
+                    logger.info(msg, epoch, count, samples_per_sec, tokens_per_sec, updates_per_sec,
+                                *itertools.chain.from_iterable(zip(names, values)))
 
                 else:
                     logger.info(self.msg, epoch, count, samples_per_sec, tokens_per_sec, updates_per_sec)
 
-                self.tic = time.time()
+                self.tic = time.perf_counter()
         else:
             self.init = True
-            self.tic = time.time()
+            self.tic = time.perf_counter()
 
 
 def safe_custom_metrics_logger(logging_function: Callable,
@@ -847,12 +1296,13 @@ def safe_custom_metrics_logger(logging_function: Callable,
                                global_step: int = None):
     """
     A thin wrapper for calling a custom metrics logging function, if supplied. As it uses an external function,
-    it should never throw an exception. If there is no logging_function supplied, the function does nothing.
+    it should never throw an exception. If there is no logging_function supplied, or there are no metrics, the function
+    does nothing.
     :param logging_function: The function supplied by a caller of sockeye.train
     :param metrics: A non-empty dict of (nonempty str, float/int/bool) pairs.
     :param global_step: Optional argument, which can be used e.g. by Tensorboard.
     """
-    if logging_function is None:
+    if logging_function is None or not metrics:
         return
     try:
         logging_function(metrics, global_step)
@@ -860,15 +1310,17 @@ def safe_custom_metrics_logger(logging_function: Callable,
         logging.warning("Didn't use custom metrics logger, exception '{}' occurred".format(str(e)))
 
 
-def trainer_save_states_no_dump_optimizer(trainer: mx.gluon.Trainer, fname: str):
+def trainer_get_states_no_dump_optimizer(trainer: mx.gluon.Trainer) -> bytes:
     """
-    Otherwise exact copy of `Trainer.save_states` that does not include a
-    pickled optimizer instance as part of the state.  This is compatible with
-    the standard `Trainer.load_states`, which will handle a state file with no
+    Otherwise exact copy of `Trainer.save_states` that returns the serialized
+    states instead of writing them to file and does not include a pickled
+    optimizer instance as part of the state.  This is compatible with the
+    standard `Trainer.load_states`, which will handle a state file with no
     optimizer instance (any statements involving `self._optimizer` become
     no-ops).  This is especially important when using AMP, which patches the
     optimizer at runtime with references to a specific loss scaler instance.
     Loading a stale optimizer instance causes errors.
+    Optimizer states are copied to the host, so the result can be written to file while training continues.
     """
     assert trainer._optimizer is not None
 
@@ -880,7 +1332,7 @@ def trainer_save_states_no_dump_optimizer(trainer: mx.gluon.Trainer, fname: str)
     if trainer._update_on_kvstore:
         assert not trainer._params_to_init, "Cannot save trainer states when some " \
                                             "parameters are not yet initialized in kvstore."
-        trainer._kvstore.save_optimizer_states(fname, dump_optimizer=False)
-    else:
-        with open(fname, 'wb') as fout:
-            fout.write(trainer._updaters[0].get_states(dump_optimizer=False))
+        # see KVStore.save_optimizer_states
+        assert trainer._kvstore._updater is not None, "Cannot save states for distributed training"
+        return trainer._kvstore._updater.get_states(dump_optimizer=False)
+    return trainer._updaters[0].get_states(dump_optimizer=False)
@@ -581,8 +581,24 @@ def write_metrics_file(metrics: List[Dict[str, Any]], path: str):
     """
     with open(path, 'w') as metrics_out:
         for checkpoint, metric_dict in enumerate(metrics, 1):
-            metrics_str = "\t".join(["{}={}".format(name, value) for name, value in sorted(metric_dict.items())])
-            metrics_out.write("{}\t{}\n".format(checkpoint, metrics_str))
+            metrics_out.write(_format_metrics_line(checkpoint, metric_dict))
+
+
+def append_metrics_file(metric_dict: Dict[str, Any], checkpoint: int, path: str):
+    """
+    Append metrics data of a single checkpoint to tab-separated file.
+
+    :param metric_dict: metrics data of the checkpoint.
+    :param checkpoint: Checkpoint number, starting at 1.
+    :param path: Path to append to.
+    """
+    with open(path, 'a') as metrics_out:
+        metrics_out.write(_format_metrics_line(checkpoint, metric_dict))
+
+
+def _format_metrics_line(checkpoint: int, metric_dict: Dict[str, Any]) -> str:
+    metrics_str = "\t".join(["{}={}".format(name, value) for name, value in sorted(metric_dict.items())])
+    return "{}\t{}\n".format(checkpoint, metrics_str)
 
 
 def get_validation_metric_points(model_path: str, metric: str):
@@ -778,6 +778,56 @@ def test_sharded_and_parallel_iter_same_num_batches():
         assert num_batches_seen == num_batches
 
 
+def test_prefetching_parallel_sample_iter():
+    batch_size = 2
+    buckets = data_io.define_parallel_buckets(100, 100, 10, 1, 1.0)
+    bucket_counts = [batch_size * 2 for _ in buckets]
+    bucket_batch_sizes = data_io.define_bucket_batch_sizes(buckets,
+                                                           batch_size,
+                                                           batch_type=C.BATCH_TYPE_SENTENCE,
+                                                           batch_num_devices=1,
+                                                           data_target_average_len=[None] * len(buckets))
+    dataset = data_io.ParallelDataSet(*_get_random_bucketed_data(buckets, min_count=0, max_count=5,
+                                                                 bucket_counts=bucket_counts))
+    context = [mx.cpu()]
+
+    it_parallel = data_io.ParallelSampleIter(dataset, buckets, batch_size, bucket_batch_sizes, permute=False)
+    expected_batches = []
+    while it_parallel.iter_next():
+        expected_batches.append(it_parallel.next())
+
+    it = data_io.PrefetchingParallelSampleIter(data_io.ParallelSampleIter(dataset, buckets, batch_size,
+                                                                          bucket_batch_sizes, permute=False), context)
+    for _ in range(2):
+        batches = []
+        while it.iter_next():
+            batches.append(it.next())
+        assert len(batches) == len(expected_batches)
+        for batch, expected_batch in zip(batches, expected_batches):
+            assert isinstance(batch.source, list)
+            assert np.allclose(batch.source[0].asnumpy(), expected_batch.source.asnumpy())
+            assert np.allclose(batch.target[0].asnumpy(), expected_batch.target.asnumpy())
+        with pytest.raises(StopIteration):
+            it.next()
+        it.reset()
+
+    with TemporaryDirectory() as work_dir:
+        fname = os.path.join(work_dir, "saved_iter")
+        it.next()
+        it.next()
+        it.save_state(fname)
+
+        it_loaded = data_io.PrefetchingParallelSampleIter(data_io.ParallelSampleIter(dataset, buckets, batch_size,
+                                                                                     bucket_batch_sizes,
+                                                                                     permute=False), context)
+        it_loaded.load_state(fname)
+        # resumes with the first batch that was not consumed before saving
+        loaded_batch = it_loaded.next()
+        assert np.allclose(loaded_batch.source[0].asnumpy(), expected_batches[2].source.asnumpy())
+        it_loaded.close()
+        assert not it_loaded.iter_next()
+
+
 def test_create_target_and_shifted_label_sequences():
     target_and_label = mx.nd.array([[C.BOS_ID, 4, 17, 35, 12, C.EOS_ID, C.PAD_ID, C.PAD_ID],
                                     [C.BOS_ID, 15, 23, 23, 77, 55, 22, C.EOS_ID],
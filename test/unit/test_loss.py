@@ -65,6 +65,41 @@ def test_loss_metric():
     assert np.isnan(metric.get())
 
 
+def test_loss_metric_update_ndarray():
+    metric = sockeye.loss.LossMetric(name='metric')
+    metric.update_ndarray(mx.nd.array([2.0]), mx.nd.array([2.0]))
+    metric.update_ndarray(mx.nd.array([2.0]), mx.nd.array([6.0]))
+    assert metric.get() == 0.5
+    metric.update(loss=4, num_samples=8)
+    metric.update_ndarray(mx.nd.array([2.0]), mx.nd.array([4.0]))
+    assert metric.get() == 0.5
+    metric.update_ndarray(mx.nd.array([2.0]), mx.nd.array([2.0]))
+    metric.reset()
+    assert np.isnan(metric.get())
+
+
+def test_loss_metric_update_ndarray_float16():
+    metric = sockeye.loss.LossMetric(name='metric')
+    loss_value = mx.nd.array([60000.0], dtype='float16')
+    num_samples = mx.nd.array([1000.0], dtype='float16')
+    metric.update_ndarray(loss_value, num_samples)
+    metric.update_ndarray(loss_value, num_samples)
+    # sums exceed the float16 range
+    assert metric.get() == 60.0
+    assert loss_value.asscalar() == 60000.0
+
+
+def test_get_metric_values():
+    metric = sockeye.loss.LossMetric(name='metric')
+    metric.update(loss=2, num_samples=4)
+    ppl = sockeye.loss.PerplexityMetric()
+    ppl.update(0.0, 1)
+    names, values = sockeye.loss.get_metric_values([metric, ppl])
+    assert names == ['metric', C.PERPLEXITY]
+    assert values == [0.5, 1.0]
+    assert sockeye.loss.get_metric_values([]) == ([], [])
+
+
 def test_cross_entropy_loss():
     b = sockeye.loss.CrossEntropyLoss()
     b.initialize()
@@ -0,0 +1,279 @@
+# Copyright 2017--2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not
+# use this file except in compliance with the License. A copy of the License
+# is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import errno
+import io
+import math
+import os
+import pickle
+import random
+from collections import deque
+from tempfile import TemporaryDirectory
+
+import mxnet as mx
+import numpy as np
+import pytest
+
+import sockeye.encoder
+import sockeye.model
+from sockeye import constants as C
+from sockeye import loss
+from sockeye import training
+from sockeye import utils
+from sockeye.optimizers import OptimizerConfig
+
+
+def test_pack_unpack_sections():
+    sections = [('rng', b'\x00\x01\x02'), ('empty', b''), ('state', b'{"checkpoint":1}')]
+    data = training._pack_sections(sections)
+    assert training._unpack_sections(data) == dict(sections)
+    assert training._unpack_sections(b'') == {}
+
+
+@pytest.mark.parametrize("length", [2, 10, 31])
+def test_unpack_sections_truncated(length):
+    data = training._pack_sections([('state', b'{"checkpoint":1}')])
+    assert len(data) == 33
+    with pytest.raises(utils.SockeyeError):
+        training._unpack_sections(data[:length])
+
+
+def _make_train_state() -> training.TrainState:
+    state = training.TrainState(C.PERPLEXITY)
+    state.checkpoint = 3
+    state.updates = 30
+    state.best_checkpoint = 2
+    state.metrics = [{'perplexity-train': 12.5, 'perplexity-val': float('nan')},
+                     {'perplexity-train': 10.0, 'perplexity-val': np.float32(9.5)}]
+    state.best_metric_history = deque([float('inf'), 11.0, 9.5], maxlen=3)
+    state.best_metric = 9.5
+    return state
+
+
+def _assert_train_states_equal(loaded: training.TrainState, expected: training.TrainState):
+    for key in training.TrainState.__slots__:
+        if key in ('_tic_last_time_elapsed', 'metrics', 'best_metric_history'):
+            continue
+        assert getattr(loaded, key) == getattr(expected, key), key
+    assert isinstance(loaded.best_metric_history, deque)
+    assert list(loaded.best_metric_history) == list(expected.best_metric_history)
+    assert len(loaded.metrics) == len(expected.metrics)
+    for loaded_metrics, expected_metrics in zip(loaded.metrics, expected.metrics):
+        assert loaded_metrics.keys() == expected_metrics.keys()
+        for name, value in expected_metrics.items():
+            assert loaded_metrics[name] == value or (math.isnan(loaded_metrics[name]) and math.isnan(value))
+
+
+def test_train_state_serialize_deserialize():
+    state = _make_train_state()
+    data = state.serialize()
+    assert data[:1] == b'{'
+    _assert_train_states_equal(training.TrainState.deserialize(data), state)
+
+    # worst perplexity is infinite
+    initial_state = training.TrainState(C.PERPLEXITY)
+    loaded_initial_state = training.TrainState.deserialize(initial_state.serialize())
+    assert loaded_initial_state.best_metric == float('inf')
+    assert list(loaded_initial_state.best_metric_history) == [float('inf')]
+
+
+def test_train_state_deserialize_pickled():
+    state = _make_train_state()
+    state.update_time_elapsed()
+    # training states saved by earlier versions
+    _assert_train_states_equal(training.TrainState.deserialize(pickle.dumps(state)), state)
+
+
+@pytest.mark.parametrize("pickled", [False, True])
+def test_numpy_rng_state_serialize_load(pickled):
+    np.random.seed(13)
+    np.random.normal()  # caches a Gaussian
+    random.seed(13)
+    if pickled:
+        # format of earlier versions
+        numpy_rng_state = pickle.dumps(np.random.get_state())
+    else:
+        numpy_rng_state = training._serialize_numpy_rng_state()
+        assert numpy_rng_state[:len(training._NUMPY_RNG_STATE_HEADER)] == training._NUMPY_RNG_STATE_HEADER
+    rng_states = pickle.dumps(random.getstate()) + numpy_rng_state
+    expected_numpy = np.random.normal(size=5)
+    expected_python = random.random()
+
+    np.random.seed(1)
+    random.seed(1)
+    python_rng_state = io.BytesIO(rng_states)
+    random.setstate(pickle.load(python_rng_state))
+    training._load_numpy_rng_state(rng_states, offset=python_rng_state.tell())
+    assert np.array_equal(np.random.normal(size=5), expected_numpy)
+    assert random.random() == expected_python
+
+
+@pytest.mark.parametrize("size", [0, 5, 64, 1000 + 3])
+def test_write_file_durably(monkeypatch, size):
+    # small chunks, such that larger data is written concurrently
+    monkeypatch.setattr(training, '_WRITE_CHUNK_SIZE', 8)
+    data = bytes(np.random.randint(0, 256, size=size, dtype=np.uint8))
+    with TemporaryDirectory() as work_dir:
+        fname = os.path.join(work_dir, 'data')
+        with open(fname, 'wb') as fp:
+            fp.write(b'previous content, longer than some of the data')
+        training._write_file_durably(fname, data)
+        with open(fname, 'rb') as fp:
+            assert fp.read() == data
+
+
+def test_write_file_durably_partial_writes(monkeypatch):
+    pwrite = os.pwrite
+
+    def partial_pwrite(fd, data, offset):
+        return pwrite(fd, data[:3], offset)
+
+    monkeypatch.setattr(training, '_WRITE_CHUNK_SIZE', 8)
+    monkeypatch.setattr(os, 'pwrite', partial_pwrite)
+    data = bytes(range(50))
+    with TemporaryDirectory() as work_dir:
+        fname = os.path.join(work_dir, 'data')
+        training._write_file_durably(fname, data)
+        with open(fname, 'rb') as fp:
+            assert fp.read() == data
+
+
+class _TrainIter:
+    """
+    Data iterator that only saves a state.
+    """
+
+    def save_state(self, fname: str):
+        with open(fname, 'wb') as fp:
+            fp.write(b'iter')
+
+
+def _create_model() -> sockeye.model.SockeyeModel:
+    config_embed = sockeye.encoder.EmbeddingConfig(vocab_size=20, num_embed=4, dropout=0.0)
+    config_encoder = sockeye.encoder.EncoderConfig(model_size=4, attention_heads=1, feed_forward_num_hidden=4,
+                                                   act_type='relu', num_layers=1, dropout_attention=0.0,
+                                                   dropout_act=0.0, dropout_prepost=0.0,
+                                                   positional_embedding_type='fixed', preprocess_sequence='',
+                                                   postprocess_sequence='', max_seq_len_source=30,
+                                                   max_seq_len_target=30)
+    config = sockeye.model.ModelConfig(config_data=None, vocab_source_size=20, vocab_target_size=20,
+                                       config_embed_source=config_embed, config_embed_target=config_embed,
+                                       config_encoder=config_encoder, config_decoder=config_encoder)
+    model = sockeye.model.SockeyeModel(config=config)
+    model.initialize(init='xavier', ctx=mx.cpu())
+    # completes the deferred initialization of the parameters
+    model(mx.nd.ones((1, 4, 1)), mx.nd.array([4]), mx.nd.ones((1, 4)), mx.nd.array([4]))
+    return model
+
+
+def _create_trainer(output_dir: str) -> training.GluonEarlyStoppingTrainer:
+    model = _create_model()
+    config = training.TrainerConfig(output_dir=output_dir, early_stopping_metric=C.PERPLEXITY,
+                                    max_params_files_to_keep=1, keep_initializations=False, checkpoint_interval=1,
+                                    max_num_checkpoint_not_improved=-1, checkpoint_improvement_threshold=0.0)
+    optimizer_config = OptimizerConfig(name='sgd', params={}, kvstore='device', initializer=mx.init.Xavier(),
+                                       gradient_clipping_type=C.GRADIENT_CLIPPING_TYPE_NONE,
+                                       gradient_clipping_threshold=None)
+    trainer = training.GluonEarlyStoppingTrainer(config=config, optimizer_config=optimizer_config,
+                                                 sockeye_model=model,
+                                                 trainer=mx.gluon.Trainer(model.collect_params(), 'sgd'),
+                                                 loss_functions=[loss.CrossEntropyLoss()], context=[mx.cpu()],
+                                                 dtype=C.DTYPE_FP32)
+    trainer.state = training.TrainState(C.PERPLEXITY)
+    return trainer
+
+
+def _save_checkpoint(trainer: training.GluonEarlyStoppingTrainer):
+    trainer.state.checkpoint += 1
+    trainer._save_params()
+    trainer._save_training_state(_TrainIter(), save_best_optimizer_states=False)
+    trainer._wait_for_checkpoint_writes()
+
+
+def test_save_training_state_recycles_directory():
+    with TemporaryDirectory() as work_dir:
+        trainer = _create_trainer(work_dir)
+        training_state_dirname = os.path.join(work_dir, C.TRAINING_STATE_DIRNAME)
+        temp_dirname = os.path.join(work_dir, C.TRAINING_STATE_TEMP_DIRNAME)
+        expected_files = sorted([C.BUCKET_ITER_STATE_NAME, C.TRAINING_STATE_META_NAME, C.OPT_STATES_LAST,
+                                 C.TRAINING_STATE_PARAMS_NAME])
+
+        _save_checkpoint(trainer)
+        assert sorted(os.listdir(training_state_dirname)) == expected_files
+        assert not os.path.exists(temp_dirname)
+
+        # files of the earlier format left in the training state directory
+        for fname in (C.RNG_STATE_NAME, C.TRAINING_STATE_NAME):
+            open(os.path.join(training_state_dirname, fname), 'wb').close()
+        for _ in range(2):
+            _save_checkpoint(trainer)
+            assert sorted(os.listdir(training_state_dirname)) == expected_files
+        # the previous training state directory is kept for the next save
+        assert os.path.isdir(temp_dirname)
+        for dirname in (training_state_dirname, temp_dirname):
+            for fname in (C.RNG_STATE_NAME, C.TRAINING_STATE_NAME):
+                assert not os.path.exists(os.path.join(dirname, fname))
+
+        with open(os.path.join(training_state_dirname, C.TRAINING_STATE_META_NAME), 'rb') as fp:
+            sections = training._unpack_sections(fp.read())
+        assert training.TrainState.deserialize(sections[training._META_TRAINING_STATE]).checkpoint == 3
+        trainer._checkpoint_executor.shutdown()
+
+
+def test_save_training_state_removes_leftover_directory():
+    with TemporaryDirectory() as work_dir:
+        trainer = _create_trainer(work_dir)
+        _save_checkpoint(trainer)
+
+        # directory of an aborted process, which blocks moving the previous training state aside
+        delete_dirname = os.path.join(work_dir, C.TRAINING_STATE_TEMP_DELETENAME)
+        os.mkdir(delete_dirname)
+        open(os.path.join(delete_dirname, C.OPT_STATES_LAST), 'wb').close()
+
+        _save_checkpoint(trainer)
+        assert not os.path.exists(delete_dirname)
+        assert os.path.isdir(os.path.join(work_dir, C.TRAINING_STATE_TEMP_DIRNAME))
+        assert C.TRAINING_STATE_META_NAME in os.listdir(os.path.join(work_dir, C.TRAINING_STATE_DIRNAME))
+        trainer._checkpoint_executor.shutdown()
+
+
+def test_save_training_state_links_params():
+    with TemporaryDirectory() as work_dir:
+        trainer = _create_trainer(work_dir)
+        params_file = os.path.join(work_dir, C.TRAINING_STATE_DIRNAME, C.TRAINING_STATE_PARAMS_NAME)
+        for checkpoint in range(1, 4):
+            _save_checkpoint(trainer)
+            current_params_fname = os.path.join(work_dir, C.PARAMS_NAME % checkpoint)
+            assert not os.path.islink(params_file)
+            assert os.path.samefile(params_file, current_params_fname)
+            assert os.stat(current_params_fname).st_nlink == 2
+            # previous parameter files are removed, with no link keeping them on disk
+            assert not os.path.exists(os.path.join(work_dir, C.TRAINING_STATE_TEMP_DIRNAME,
+                                                   C.TRAINING_STATE_PARAMS_NAME))
+        trainer._checkpoint_executor.shutdown()
+
+
+def test_save_training_state_links_params_without_hard_links(monkeypatch):
+    def link(src, dst):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV), src, None, dst)
+
+    monkeypatch.setattr(os, 'link', link)
+    with TemporaryDirectory() as work_dir:
+        trainer = _create_trainer(work_dir)
+        params_file = os.path.join(work_dir, C.TRAINING_STATE_DIRNAME, C.TRAINING_STATE_PARAMS_NAME)
+        for checkpoint in range(1, 3):
+            _save_checkpoint(trainer)
+            assert os.path.islink(params_file)
+            assert os.readlink(params_file) == os.path.join('..', C.PARAMS_NAME % checkpoint)
+            assert os.path.samefile(params_file, os.path.join(work_dir, C.PARAMS_NAME % checkpoint))
+        trainer._checkpoint_executor.shutdown()
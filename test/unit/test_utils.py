@@ -390,3 +390,19 @@ def test_write_read_metric_file():
 
     assert len(read_metrics) == len(expected_metrics)
     assert expected_metrics == read_metrics
+
+
+def test_append_metric_file():
+    expected_metrics = [{'float_metric':3.45, 'bool_metric': True},
+                       {'float_metric':1.0, 'bool_metric': False},
+                       {'float_metric':0.5, 'bool_metric': True}]
+    with TemporaryDirectory(prefix="metric_file") as work_dir:
+        metric_path = os.path.join(work_dir, "metrics")
+        utils.write_metrics_file(expected_metrics[:2], metric_path)
+        utils.append_metrics_file(expected_metrics[2], 3, metric_path)
+        read_metrics = utils.read_metrics_file(metric_path)
+        with open(metric_path) as fin:
+            checkpoints = [int(line.split('\t')[0]) for line in fin]
+
+    assert expected_metrics == read_metrics
+    assert checkpoints == [1, 2, 3]